@@ -16,6 +16,18 @@
 #           with 'eggs' word in its title")
 #       and others.
 #
+#       Searches by title and ingredients can also be done in "fuzzy" mode,
+#       tolerating typos and accents (i.e: "tomatoe" finds "tomato"). Such
+#       searches are served by indexes built on the first fuzzy search
+#       (see fuzzy_index.py)
+#
+#       A single Chef can read several recipes files at once (i.e: the
+#       English and the Spanish books) into the same recipe book, and
+#       the recipe unique ids are prefixed with the name of their file
+#       (i.e: "recipes_spa:1"). An optional synonyms file lets an
+#       ingredient search in one language find the recipes written in
+#       another (i.e: "huevos" also finds "eggs").
+#
 #       Chef class should be the interface (or gateway) between the user
 #       and the datasets (recipes.csv and ingredients.csv), so its design
 #       must be focused in being easy to use and as intuitive as possible.
@@ -46,8 +58,12 @@
 #   along with this program.  If not, see <http://www.gnu.org/licenses/>.
 ################################################################################
 
+import itertools
+import os
 import random
 
+from fuzzy_index import FuzzyIndex
+
 class Chef():
 
     ############################################################################
@@ -63,6 +79,16 @@ class Chef():
     ingr_field_index = 2 # "ingr" stands for "ingredients"
     not_apply_value = "n-a"
 
+    # When reading several recipes files, unique ids are written as
+    # <file name><source_separator><unique id> (i.e: "recipes_eng:1")
+    source_separator = ":"
+
+    # Default number of typos allowed on fuzzy searches, per word:
+    # "max_distance", but only 1 every "chars_per_typo" characters of
+    # the word (so short words allow less typos, see fuzzy_index.py)
+    default_max_distance = 2
+    default_chars_per_typo = FuzzyIndex.chars_per_typo
+
 
     ############################################################################
     # METHODS
@@ -71,11 +97,18 @@ class Chef():
     def __init__(self,
                  recipes_file="./recipes.csv",
                  shopping_list_file="./shopping_list.txt",
-                 notes_file="./cocynero_notes.txt"):
+                 notes_file="./cocynero_notes.txt",
+                 synonyms_file=None):
 
         # By default, the input file with the recpes data is "recipes.csv"
+        # A list of files can be provided too, so all of them are read
+        # into the same recipe_book.
         self.recipes_file_abspath = recipes_file
 
+        # Optional file with groups of equivalent ingredient names,
+        # one group per line (i.e: "eggs;huevos;huevo").
+        self.synonyms_file_abspath = synonyms_file
+
         # By default, the file where the shopping list will be written
         # is called "shopping_list.txt"
         self.shopping_list_file_abspath = shopping_list_file
@@ -103,10 +136,27 @@ class Chef():
         # List holding the ingredients of the recipes in "menu" dictionary
         self.shopping_list = []
 
+        # Indexes used by the fuzzy searches. They are built from the words
+        # of the recipe titles and ingredients, but only when the first
+        # fuzzy search is done, so users of exact searches do not pay for them
+        self.title_index = FuzzyIndex()
+        self.ingr_index = FuzzyIndex()
+        self.are_indexes_built = False
+
+        # Dictionary holding, for each (folded) ingredient name in the
+        # synonyms file, the list of all its equivalent names
+        self.synonyms = {}
+
 
     def cleanup(self):
         self.is_chef_configured = False
-        self.recipe_book.clear()
+        # New objects instead of clearing the current ones, because they
+        # may be read-only views of a shared book (see shared_book.py)
+        self.recipe_book = {}
+        self.synonyms = {}
+        self.title_index = FuzzyIndex()
+        self.ingr_index = FuzzyIndex()
+        self.are_indexes_built = False
         self.menu = []
         self.shopping_list = []
 
@@ -142,6 +192,25 @@ class Chef():
                 + "\n\tBad ID is: {id}".format(id=kwargs)
             do_this_action = None
 
+        elif error_code == 5:
+            message = \
+                error_title + "Error with synonyms file {file}. Error is as follows: {e}\n".format(
+                    file=self.synonyms_file_abspath,
+                    e=kwargs)
+            do_this_action = None
+
+        elif error_code == 6:
+            message = \
+                error_title + "Several recipes files have the same name, so their" \
+                    + " unique ids would collide: {f}".format(f=kwargs)
+            do_this_action = None
+
+        elif error_code == 7:
+            message = \
+                error_title + "Bad offset or limit (they shall be integers, 0 or bigger)." \
+                    + "\n\tValues are: {v}".format(v=kwargs)
+            do_this_action = None
+
 
         message_header = "\n"*3 + "*"*80 + "\n"
         message_footer = "\n" + "*"*80 + "\n"*3
@@ -163,42 +232,63 @@ class Chef():
         self.is_chef_configured = False
 
         # Configuration involves:
-        # - Checking if recipes_file exist and is readable
-        # - Loading the contents of recipes_file into recipe_book
+        # - Checking if recipes_file(s) exist and are readable
+        # - Loading the contents of recipes_file(s) into recipe_book
+        # - Loading the synonyms file (if any)
         # - Check the recipe_book is not empty
-        try:
-            print("Chef is reading recipes from {f}".format(f=self.recipes_file_abspath))
-            with open(self.recipes_file_abspath, mode='r', encoding='utf-8') as reader:
-                content = reader.readlines()
-
-                # Lines starting with a # character are comments
-                # so they are ignored
-                valid_lines = list(filter(lambda x: not x.strip().startswith("#"), content))
-
-                # Remove blank lines (Probably there is a better way to do this)
-                valid_lines = [x for x in valid_lines if x]
-
-                # Remove white-space characters (in a way that may be considered "overkill")
-                valid_lines = [x.rstrip().strip().lstrip() for x in valid_lines if x]
-
-                # Populate the dictionary
-                # - Keys of the dictionary are Strings, representing unsigned integer numbers
-                #   (the unique id value)
-                # - Values of the dictionary are Lists, containing the recipe name, ingredients, etc
-                for line in valid_lines:
-                    fields = line.split(self.field_separator)
-
-                    # When splitting the line by the field_separator,
-                    # the index 0 element will be unique id value,
-                    # while the rest of elements are the recipe title,
-                    # the ingredients, etc
-                    self.recipe_book[fields[0]] = fields[1:]
+        if isinstance(self.recipes_file_abspath, (list, tuple)):
+            recipes_files = list(self.recipes_file_abspath)
+        else:
+            recipes_files = [self.recipes_file_abspath]
+
+        # The name of each file is the prefix of its unique ids, so
+        # two files with the same name (i.e: "eng/recipes.csv" and
+        # "spa/recipes.csv") would overwrite the recipes of each other
+        if len(recipes_files) > 1:
+            source_names = [self.source_name(f) for f in recipes_files]
+            repeated = [f for f, n in zip(recipes_files, source_names) if source_names.count(n) > 1]
+            if repeated:
+                self.handle_error(error_code=6, recipes_files=repeated)
+                return
 
+        # Recipes are loaded in a new dictionary, that replaces recipe_book
+        # only when ALL files have been read. This way, a failure in one
+        # file does not leave a half-loaded book (that a later config would
+        # mix with the new content).
+        recipe_book = {}
+        try:
+            if len(recipes_files) == 1:
+                recipe_book.update(self.read_recipes_file(recipes_files[0]))
+            else:
+                # Files are read one after the other. Reading them in
+                # parallel threads is slower: parsing the lines is CPU work,
+                # so threads just fight for the interpreter lock. Processes
+                # are slower too, because the parsed books must be sent
+                # back to this process, which costs more than parsing them.
+                for recipes_file in recipes_files:
+                    recipe_book.update(
+                        self.read_recipes_file(recipes_file, self.source_name(recipes_file)))
 
         except IOError as err:
             self.handle_error(error_code=2, error_details=err)
             return
 
+        # Book, synonyms and indexes are always new objects (never updated
+        # in place), because the current ones may be read-only views of a
+        # shared book (see shared_book.py) if the Chef was attached to it
+        self.recipe_book = recipe_book
+        self.synonyms = {}
+        self.title_index = FuzzyIndex()
+        self.ingr_index = FuzzyIndex()
+        self.are_indexes_built = False
+
+        if self.synonyms_file_abspath:
+            try:
+                self.read_synonyms_file()
+            except IOError as err:
+                self.handle_error(error_code=5, error_details=err)
+                return
+
         if not self.recipe_book:
             self.handle_error(error_code=3)
             return
@@ -215,6 +305,98 @@ class Chef():
         self.is_chef_configured = True
 
 
+    # Name used to prefix the unique ids of the recipes of a file,
+    # when reading several files (i.e: "recipes_eng" for "./recipes_eng.csv")
+    def source_name(self, recipes_file):
+        return os.path.splitext(os.path.basename(recipes_file))[0]
+
+
+    # Read a recipes file and return its content as a dictionary,
+    # in the same format as recipe_book. If "source" is provided,
+    # the unique ids are prefixed with it.
+    # IOError exceptions are left to the caller.
+    def read_recipes_file(self, recipes_file, source=None):
+        book = {}
+        print("Chef is reading recipes from {f}".format(f=recipes_file))
+        with open(recipes_file, mode='r', encoding='utf-8') as reader:
+            content = reader.readlines()
+
+            # Lines starting with a # character are comments
+            # so they are ignored
+            valid_lines = list(filter(lambda x: not x.strip().startswith("#"), content))
+
+            # Remove blank lines (Probably there is a better way to do this)
+            valid_lines = [x for x in valid_lines if x]
+
+            # Remove white-space characters (in a way that may be considered "overkill")
+            valid_lines = [x.rstrip().strip().lstrip() for x in valid_lines if x]
+
+            # Populate the dictionary
+            # - Keys of the dictionary are Strings, representing unsigned integer numbers
+            #   (the unique id value)
+            # - Values of the dictionary are Lists, containing the recipe name, ingredients, etc
+            for line in valid_lines:
+                fields = line.split(self.field_separator)
+
+                # When splitting the line by the field_separator,
+                # the index 0 element will be unique id value,
+                # while the rest of elements are the recipe title,
+                # the ingredients, etc
+                if source:
+                    unique_id = source + self.source_separator + fields[0]
+                else:
+                    unique_id = fields[0]
+                book[unique_id] = fields[1:]
+
+        return book
+
+
+    # Read the synonyms file into the "synonyms" dictionary.
+    # Each line is a group of equivalent ingredient names, separated
+    # by field_separator. Lines starting with # are comments.
+    # IOError exceptions are left to the caller.
+    def read_synonyms_file(self):
+        self.synonyms = {}
+        print("Chef is reading synonyms from {f}".format(f=self.synonyms_file_abspath))
+        with open(self.synonyms_file_abspath, mode='r', encoding='utf-8') as reader:
+            for line in reader:
+                if line.strip().startswith("#"):
+                    continue
+                names = [x.strip().lower() for x in line.split(self.field_separator) if x.strip()]
+                for name in names:
+                    group = self.synonyms.setdefault(FuzzyIndex.fold(name), [])
+                    group.extend(x for x in names if x not in group)
+
+
+    # Return the list of names (lowercase) to look for when searching
+    # the ingredient: the ingredient itself plus all its synonyms (if any)
+    def ingredient_alternatives(self, ingredient):
+        ingredient = ingredient.lower()
+        alternatives = [ingredient]
+        for name in self.synonyms.get(FuzzyIndex.fold(ingredient), []):
+            if name not in alternatives:
+                alternatives.append(name)
+        return alternatives
+
+
+    # Fill the fuzzy search indexes with the words of every recipe
+    # title and ingredient. Any previous content is discarded.
+    # It is called by the first fuzzy search, but it can be called
+    # before (i.e: to avoid making the first user wait for it)
+    def build_indexes(self):
+        title_index = FuzzyIndex()
+        ingr_index = FuzzyIndex()
+        for unique_id, fields in self.recipe_book.items():
+            if len(fields) > self.title_field_index:
+                title_index.add(fields[self.title_field_index], unique_id)
+            for ingredient in fields[self.ingr_field_index:]:
+                ingr_index.add(ingredient, unique_id)
+
+        self.title_index = title_index
+        self.ingr_index = ingr_index
+        self.are_indexes_built = True
+
+
     # This is a rather simple function to "pretty print" a pair of
     # key-value from a dictionary, in a specific format that may be easily
     # changed in the future.
@@ -253,7 +435,76 @@ class Chef():
             self.handle_error(error_code=2, error_details=err)
 
 
-    def do_shopping_list(self, recipes_list=None):
+    # Print and write "lines" one by one, as they are generated, so the
+    # memory used does not depend on the number of lines, and the first
+    # ones are shown immediately.
+    # - offset: number of lines to skip first
+    # - limit: maximum number of lines to print (None means no limit)
+    # - count_only: do not print the lines, just count them
+    # The file is written (or overwritten) with the same content
+    # printed in the terminal. Returns the number of lines.
+    # Bad "offset" or "limit" values are checked before opening the
+    # file, so a wrong request does not erase the previous results.
+    def stream_lines(self, lines, file_abspath, offset=0, limit=None, count_only=False):
+        if not (isinstance(offset, int) and offset >= 0) \
+                or not (limit is None or (isinstance(limit, int) and limit >= 0)):
+            self.handle_error(error_code=7, offset=offset, limit=limit)
+            return 0
+
+        stop = offset + limit if limit is not None else None
+        page = itertools.islice(lines, offset, stop)
+        number_of_lines = 0
+        try:
+            with open(file_abspath, mode='w', encoding='utf-8') as writer:
+                if count_only:
+                    number_of_lines = sum(1 for _ in page)
+                    writer.write("{n}\n".format(n=number_of_lines))
+                else:
+                    for line in page:
+                        print(line)
+                        writer.write(line + "\n")
+                        number_of_lines += 1
+            print("{n} results written also in {f}".format(n=number_of_lines, f=file_abspath))
+        except IOError as err:
+            self.handle_error(error_code=2, error_details=err)
+
+        return number_of_lines
+
+
+    # Streaming version of "show_menu": print and write to the notes
+    # file the recipes with the given unique ids (any iterable, like
+    # the generators returned by the "iter_matching_(...)" methods).
+    def stream_results(self, unique_ids, offset=0, limit=None, count_only=False):
+        lines = (self.print_key_value(k) for k in unique_ids)
+        return self.stream_lines(lines, self.notes_file_abspath, offset, limit, count_only)
+
+
+    # Generate, one by one, the lines of the shopping list of the recipes
+    # with the given unique ids (a title line per recipe, followed
+    # by its ingredients)
+    def iter_shopping_list(self, unique_ids):
+        for unique_id in unique_ids:
+            try:
+                recipe_title = self.recipe_book[unique_id][self.title_field_index]
+            except:
+                self.handle_error(error_code=4, bad_id=unique_id)
+                continue
+
+            yield "### {id}: {title} ###".format(
+                id=unique_id,
+                title=recipe_title)
+
+            yield from self.recipe_book[unique_id][self.ingr_field_index:]
+
+
+    # If "stream" is True, the shopping list is written line by line as
+    # it is generated, and it is NOT kept in the "shopping_list" attribute.
+    def do_shopping_list(self, recipes_list=None, stream=False):
+        if stream:
+            unique_ids = [str(x) for x in recipes_list] if recipes_list else self.menu
+            self.stream_lines(self.iter_shopping_list(unique_ids), self.shopping_list_file_abspath)
+            return
+
         # If the user inputs a list of unique IDs, the shopping list
         # is forcefully generated
         if recipes_list:
@@ -264,21 +515,7 @@ class Chef():
         # but "do_shopping_list" seems a more natural way
         # to ask for the shopping list (it avoids use the word "print")
         if not self.shopping_list:
-            for unique_id in self.menu:
-                try:
-                    recipe_title = self.recipe_book[unique_id][self.title_field_index]
-                except:
-                    self.handle_error(error_code=4, bad_id=unique_id)
-                    continue
-
-                recipe_title_line = "### {id}: {title} ###".format(
-                    id=unique_id,
-                    title=recipe_title)
-
-                ingredients = self.recipe_book[unique_id][self.ingr_field_index:]
-
-                self.shopping_list.append(recipe_title_line)
-                self.shopping_list = self.shopping_list + ingredients
+            self.shopping_list = list(self.iter_shopping_list(self.menu))
 
         self.print_shopping_list()
 
@@ -313,28 +550,45 @@ class Chef():
     # Append to the "menu" list all recipes with the specified "pattern"
     # in the specified "field" (i.e: all recipes with word "eggs" in "title")
     def find_matching_recipes(self, field, pattern):
-        for unique_id in self.recipe_book:
+        self.menu.extend(self.iter_matching_recipes(field, pattern))
+
+
+    # Generator version of "find_matching_recipes": yields the unique ids
+    # one by one, as they are found, without storing them anywhere
+    def iter_matching_recipes(self, field, pattern):
+        # items() instead of looking up each id, so a shared book
+        # (see shared_book.py) is also read in a single linear pass
+        for unique_id, fields in self.recipe_book.items():
             # This try-catch block should NOT be necessary, but it is leave
             # just for security (in case the recipes file is ill-formed or something)
             try:
-                target_field = self.recipe_book[unique_id][field].lower()
+                target_field = fields[field].lower()
             except:
                 return
 
             if pattern in target_field:
-                self.menu.append(unique_id)
+                yield unique_id
 
 
     # Append to the "menu" list all recipes that use all or any
     # of the ingredients provided as input parameter
     # (i.e: input parameter is [eggs, olive oil], so find
     # all recipes using egss, olive oil, or both)
+    # Each ingredient also matches through its synonyms (if any), in the
+    # same pass over the book.
     def find_matching_ingredients(self, matching_ingredients, mode):
-        for unique_id in self.recipe_book:
+        self.menu.extend(self.iter_matching_ingredients(matching_ingredients, mode))
+
+
+    # Generator version of "find_matching_ingredients"
+    def iter_matching_ingredients(self, matching_ingredients, mode):
+        alternatives_list = [self.ingredient_alternatives(x) for x in matching_ingredients]
+
+        for unique_id, fields in self.recipe_book.items():
             # This try-catch block should NOT be necessary, but it is leave
             # just for security (in case the recipes file is ill-formed or something)
             try:
-                recipe_ingredients = self.recipe_book[unique_id][self.ingr_field_index:]
+                recipe_ingredients = fields[self.ingr_field_index:]
             except:
                 return
 
@@ -342,7 +596,6 @@ class Chef():
             # the typical case where "eggs" are not found, but there are Eggs,
             # or even eGGS
             recipe_ingredients = [x.lower() for x in recipe_ingredients]
-            matching_ingredients = [x.lower() for x in matching_ingredients]
 
             # Turn the recipe ingredients list in a single string, so the "any"
             # and "all" functions will work as intended. The goal is to find
@@ -366,8 +619,99 @@ class Chef():
             else:
                 method = all
 
-            if method(x in ingredients_string for x in matching_ingredients):
-                self.menu.append(unique_id)
+            if method(any(x in ingredients_string for x in alternatives)
+                      for alternatives in alternatives_list):
+                yield unique_id
+
+
+    # Fuzzy version of "find_matching_recipes" (only for titles).
+    # Append to the "menu" list all recipes whose title contains all the
+    # words of "pattern", allowing up to "max_distance" typos per word
+    # (and 1 every "chars_per_typo" characters). Best matches (less
+    # typos) go first.
+    def find_fuzzy_matching_recipes(self, pattern, max_distance,
+                                    chars_per_typo=default_chars_per_typo):
+        self.menu.extend(self.iter_fuzzy_matching_recipes(pattern, max_distance, chars_per_typo))
+
+
+    # Generator version of "find_fuzzy_matching_recipes". Results must be
+    # ranked before yielding the first one, but only the recipes found
+    # in the index are kept in memory, not the whole book.
+    def iter_fuzzy_matching_recipes(self, pattern, max_distance,
+                                    chars_per_typo=default_chars_per_typo):
+        if not self.are_indexes_built:
+            self.build_indexes()
+        matches = self.title_index.search(pattern, max_distance, chars_per_typo)
+        yield from sorted(matches, key=lambda k: (matches[k], k))
+
+
+    # Fuzzy version of "find_matching_ingredients".
+    # Each one of the "matching_ingredients" is searched in the ingredients
+    # index allowing typos, and the recipes are ranked by the number of
+    # matching ingredients first (more is better) and the number of typos
+    # after (less is better). Synonyms are searched in the same index.
+    def find_fuzzy_matching_ingredients(self, matching_ingredients, mode, max_distance,
+                                        chars_per_typo=default_chars_per_typo):
+        self.menu.extend(self.iter_fuzzy_matching_ingredients(matching_ingredients, mode,
+                                                              max_distance, chars_per_typo))
+
+
+    # Generator version of "find_fuzzy_matching_ingredients"
+    def iter_fuzzy_matching_ingredients(self, matching_ingredients, mode, max_distance,
+                                        chars_per_typo=default_chars_per_typo):
+        if not self.are_indexes_built:
+            self.build_indexes()
+        # {unique_id: [number of matching ingredients, total typos]}
+        scores = {}
+        for ingredient in matching_ingredients:
+            # Best match of the ingredient, or any of its synonyms, per recipe
+            matches = {}
+            for alternative in self.ingredient_alternatives(ingredient):
+                for unique_id, distance in self.ingr_index.search(alternative, max_distance,
+                                                                          chars_per_typo).items():
+                    if distance < matches.get(unique_id, distance + 1):
+                        matches[unique_id] = distance
+
+            for unique_id, distance in matches.items():
+                score = scores.setdefault(unique_id, [0, 0])
+                score[0] += 1
+                score[1] += distance
+
+        if mode != "Some":
+            scores = {k: v for k, v in scores.items() if v[0] == len(matching_ingredients)}
+
+        yield from sorted(scores, key=lambda k: (-scores[k][0], scores[k][1], k))
+
+
+    # Return a generator with the unique ids of the recipes matching the
+    # criteria of "tell_me_about" (only one criteria is used, in the same
+    # order of priority). It does not modify the Chef object, so several
+    # threads may call it at the same time.
+    def iter_matching(self,
+                      title_with=None,
+                      url_with=None,
+                      ingredients=None,
+                      matching_mode="Some",
+                      fuzzy=False,
+                      max_distance=default_max_distance,
+                      chars_per_typo=default_chars_per_typo):
+        if title_with and fuzzy:
+            return self.iter_fuzzy_matching_recipes(title_with, max_distance, chars_per_typo)
+
+        if title_with:
+            return self.iter_matching_recipes(self.title_field_index, title_with.lower())
+
+        if url_with:
+            return self.iter_matching_recipes(self.url_field_index, url_with.lower())
+
+        if ingredients and fuzzy:
+            return self.iter_fuzzy_matching_ingredients(ingredients, matching_mode,
+                                                        max_distance, chars_per_typo)
+
+        if ingredients:
+            return self.iter_matching_ingredients(ingredients, matching_mode)
+
+        return iter([])
 
 
     # This function must be read as follows:
@@ -377,12 +721,30 @@ class Chef():
     # - comming from an URL with this text pattern
     # - containing some or all of this ingredients
     #   (depending on the matching mode)
+    # If "fuzzy" is True, titles and ingredients are matched word by word,
+    # tolerating accents and up to "max_distance" typos per word
+    # (i.e: "tomatoe" or "parsely"), and results are sorted by relevance.
+    # Short words allow less typos: only 1 every "chars_per_typo"
+    # characters, so with the default values "egs" allows 1 typo and
+    # only words of 6 or more characters allow 2. A smaller
+    # "chars_per_typo" (i.e: 1) lets "max_distance" apply to every word.
+    # Swapping two adjacent letters ("fride") counts as 1 typo.
+    # If "stream" is True, or any of "offset", "limit" or "count_only" is
+    # provided, results are printed and written to the notes file one by
+    # one (see stream_results), instead of being stored in "menu".
     def tell_me_about(self,
                       recipe_id=None,
                       title_with=None,
                       url_with=None,
                       ingredients=None,
-                      matching_mode="Some"):
+                      matching_mode="Some",
+                      fuzzy=False,
+                      max_distance=default_max_distance,
+                      chars_per_typo=default_chars_per_typo,
+                      stream=False,
+                      offset=0,
+                      limit=None,
+                      count_only=False):
 
         #@TODO use a diferent list to store the matching recipes unique_ids?
         self.menu = []
@@ -396,20 +758,15 @@ class Chef():
                 self.handle_error(error_code=4, bad_id=recipe_id)
             return
 
-        elif title_with:
-            pattern = title_with.lower()
-            field = self.title_field_index
-
-        elif url_with:
-            pattern = url_with.lower()
-            field = self.url_field_index
+        unique_ids = self.iter_matching(title_with, url_with, ingredients,
+                                        matching_mode, fuzzy, max_distance,
+                                        chars_per_typo)
 
-        elif ingredients:
-            self.find_matching_ingredients(ingredients, matching_mode)
-            self.show_menu()
+        if stream or offset or limit is not None or count_only:
+            self.stream_results(unique_ids, offset, limit, count_only)
             return
 
-        self.find_matching_recipes(field, pattern)
+        self.menu.extend(unique_ids)
         self.show_menu()
 
 
@@ -430,11 +787,14 @@ class Chef():
             op6="- tell_me_about: Print recipes that matches the user criteria, like: recipes with specific ingredients, with specific title...\n",
             op7="- help: Prints this very text\n\n"))
 
-        print("Examples of my_chef.tell_me_about() are:\n{ex1}{ex2}{ex3}{ex4}{ex5}".format(
+        print("Examples of my_chef.tell_me_about() are:\n{ex1}{ex2}{ex3}{ex4}{ex5}{ex6}{ex7}{ex8}".format(
             ex1="- Print recipe with a specific ID (for example, 3455):\n   my_chef.tell_be_about(recipe_id=3455)\n",
             ex2="- Print recipes with string \"eggs\" in its title:\n   my_chef.tell_me_about(title_with=\"eggs\")\n",
             ex3="- Print recipes with string \"european\" in its URL:\n my_chef.tell_me_about(url_with=\"european\")\n",
             ex4="- Print recipes with SOME of the specified ingredients:\n  my_chef.tell_be_about(ingredients=[\"eggs\", \"bacon\"])\n",
-            ex5="- Print recipes with ALL of the specified ingredients:\n  my_chef.tell_be_about(ingredients=[(...)], matching_mode=\"All\")\n"))
+            ex5="- Print recipes with ALL of the specified ingredients:\n  my_chef.tell_be_about(ingredients=[(...)], matching_mode=\"All\")\n",
+            ex6="- Print recipes allowing typos and accents (up to max_distance=2 typos per word, but only 1 every chars_per_typo=3 letters, so \"egs\" allows just 1):\n  my_chef.tell_me_about(ingredients=[\"tomatoe\", \"parsely\"], fuzzy=True, max_distance=2, chars_per_typo=3)\n",
+            ex7="- Print only the recipes 21 to 30 with string \"a\" in its title, as they are found:\n  my_chef.tell_me_about(title_with=\"a\", offset=20, limit=10)\n",
+            ex8="- Just count the recipes with string \"a\" in its title:\n  my_chef.tell_me_about(title_with=\"a\", count_only=True)\n"))
 
         
@@ -0,0 +1,484 @@
+################################################################################
+#   Project: Cocynero
+#
+#   File: chef_server.py
+#
+#   Description:
+#       Implements the ChefServer and ChefClient classes.
+#
+#       ChefServer keeps a single, already configured Chef object (recipe
+#       book and search indexes loaded only once), and answers requests
+#       from many clients, over a Unix socket or a localhost TCP port.
+#       This way, programs that need a Chef (i.e: web frontends) do not
+#       pay the cost of reading the recipes each time they start.
+#
+#       ChefClient is the thin counterpart: it offers do_menu,
+#       do_shopping_list and tell_me_about methods, like Chef does,
+#       but returns the resulting lines instead of printing them.
+#
+#       The server never modifies its Chef object after configuration:
+#       the "menu" and "shopping list" of each user are kept by its
+#       ChefClient, so any number of clients can be served at the same
+#       time. A "reload" configures a brand new Chef and replaces the old
+#       one only when it is ready; requests already running finish with
+#       the old one.
+#
+#       Requests and responses are JSON objects, one per line:
+#           -> {"action": "tell_me_about", "args": {"title_with": "eggs"}}
+#           <- {"status": "ok", "result": ["1: Fried eggs with chips"]}
+#
+#       A common usage of this classes will be the following:
+#       '''
+#       server = ChefServer("/tmp/cocynero.sock", recipes_file="./recipes.csv")
+#       server.config()
+#       server.run()    # blocks until "server.cleanup()" is called
+#
+#       (in other process)
+#       client = ChefClient("/tmp/cocynero.sock")
+#       client.do_menu(5)
+#       client.do_shopping_list()
+#       '''
+#
+#   Notes: N/A
+#
+#   Contact: Alberto Martin Cajal, amartin.glimpse23<AT>gmail.com
+#
+#   URL: https://github.com/amcajal/cocynero
+#
+#   License: GNU GPL v3.0
+#
+#   Copyright (C) 2020 Alberto Martin Cajal
+#
+#   This file is part of Cocynero.
+#
+#   Cocynero is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Cocynero is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+import ipaddress
+import itertools
+import json
+import os
+import random
+import socket
+import socketserver
+import stat
+import threading
+
+from chef import Chef
+
+class ChefServer():
+
+    ############################################################################
+    # ATTRIBUTES
+    ############################################################################
+
+    # Only these "tell_me_about" arguments are accepted from the clients
+    # (the rest of Chef parameters, like files paths, belong to the server)
+    tell_me_about_args = ("title_with", "url_with", "ingredients",
+                          "matching_mode", "fuzzy", "max_distance", "chars_per_typo",
+                          "offset", "limit", "count_only")
+
+
+    ############################################################################
+    # METHODS
+    ############################################################################
+
+    # "address" is the path of the Unix socket (a string), or a
+    # (host, port) tuple to listen on TCP (i.e: ("localhost", 8023)).
+    # There is no authentication (any client may ask for a "reload"),
+    # so only loopback hosts (localhost, 127.0.0.1, ::1) are accepted.
+    # The rest of parameters are the ones of the Chef object.
+    def __init__(self, address, **chef_kwargs):
+        self.address = address
+        self.chef_kwargs = chef_kwargs
+
+        # The Chef object serving all requests. It is replaced (never
+        # modified) when reloading, so handlers just need to take
+        # a reference to it at the beginning of each request.
+        self.chef = None
+
+        # List with the unique ids of self.chef book, so "do_menu" does
+        # not copy them in each request. It is kept in a pair with its
+        # Chef, replaced as a whole, so a request never mixes the ids of
+        # a book with the Chef of another one.
+        self.chef_and_ids = (None, [])
+
+        # Only one reload at a time
+        self.reload_lock = threading.Lock()
+
+        self.server = None
+        self.is_server_configured = False
+
+        # True while "run" is serving requests. socketserver shutdown()
+        # waits for serve_forever() to end, so it must only be called
+        # if serve_forever() was started (or it would wait forever).
+        self.is_serving = False
+
+        # Inode of the Unix socket file created by this server, so cleanup
+        # only removes that file (and not one created by other server)
+        self.socket_inode = None
+
+
+    def cleanup(self):
+        if self.server:
+            if self.is_serving:
+                self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.socket_inode is not None:
+            try:
+                file_stat = os.stat(self.address)
+                if stat.S_ISSOCK(file_stat.st_mode) and file_stat.st_ino == self.socket_inode:
+                    os.remove(self.address)
+            except OSError:
+                pass
+            self.socket_inode = None
+        self.chef = None
+        self.chef_and_ids = (None, [])
+        self.is_server_configured = False
+
+
+    def handle_error(self, error_code, **kwargs):
+        error_title = "{class_name}: ERROR CODE {ec}:".format(
+            class_name=self.__class__,
+            ec=str(error_code))
+
+        if error_code == 1:
+            message = \
+                error_title + "Chef could NOT be configured. {d}".format(d=kwargs)
+
+        elif error_code == 2:
+            message = \
+                error_title + "Could NOT listen on {a}. Error is as follows: {e}".format(
+                    a=self.address,
+                    e=kwargs)
+
+        elif error_code == 3:
+            message = \
+                error_title + "Bad request. {d}".format(d=kwargs)
+
+        elif error_code == 4:
+            message = \
+                error_title + "{a} is in use: it is not a socket, or other server" \
+                    " is listening on it".format(a=self.address)
+
+        elif error_code == 5:
+            message = \
+                error_title + "{a} is not a loopback address. Only local clients" \
+                    " are allowed (i.e: use \"localhost\")".format(a=self.address)
+
+        message_header = "\n"*3 + "*"*80 + "\n"
+        message_footer = "\n" + "*"*80 + "\n"*3
+        print("{header}{text}{footer}".format(
+            header=message_header,
+            text=message,
+            footer=message_footer))
+
+
+    # Create and configure a new Chef. Returns None if it could not
+    # be configured.
+    def new_chef(self):
+        chef = Chef(**self.chef_kwargs)
+        chef.config()
+        if not chef.is_chef_configured:
+            return None
+
+        # Indexes are built now, and not by the first fuzzy request,
+        # so no request waits for them (or builds them twice)
+        chef.build_indexes()
+        return chef
+
+
+    def set_chef(self, chef):
+        self.chef_and_ids = (chef, list(chef.recipe_book) if chef else [])
+        self.chef = chef
+
+
+    # Remove the Unix socket file left by a server that is not running
+    # anymore (it would make bind() fail). Returns False if the path
+    # is in use: it is not a socket, or a live server is listening on it.
+    def remove_stale_socket(self):
+        try:
+            file_stat = os.stat(self.address)
+        except FileNotFoundError:
+            return True
+
+        if not stat.S_ISSOCK(file_stat.st_mode):
+            return False
+
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.address)
+            return False
+        except ConnectionRefusedError:
+            os.remove(self.address)
+            return True
+        finally:
+            probe.close()
+
+
+    # True if all the addresses the TCP host resolves to are loopback ones
+    def is_loopback_host(self):
+        try:
+            addresses = socket.getaddrinfo(self.address[0], self.address[1],
+                                           type=socket.SOCK_STREAM)
+        except socket.gaierror:
+            return False
+        return all(ipaddress.ip_address(a[4][0]).is_loopback for a in addresses)
+
+
+    # Create the TCP server on the first address the host resolves to,
+    # with its address family (IPv4 for 127.0.0.1, IPv6 for ::1)
+    def new_tcp_server(self):
+        family, _, _, _, sockaddr = socket.getaddrinfo(
+            self.address[0], self.address[1], type=socket.SOCK_STREAM)[0]
+        if family == socket.AF_INET6:
+            return ThreadingTCP6Server(sockaddr, ChefRequestHandler)
+        return ThreadingTCPServer(sockaddr, ChefRequestHandler)
+
+
+    # Configuration involves:
+    # - Loading the recipe book (and indexes) in a Chef object
+    # - Opening the socket where the clients will connect
+    def config(self):
+        self.is_server_configured = False
+
+        if not isinstance(self.address, str) and not self.is_loopback_host():
+            self.handle_error(error_code=5)
+            return
+
+        self.set_chef(self.new_chef())
+        if not self.chef:
+            self.handle_error(error_code=1, chef_kwargs=self.chef_kwargs)
+            return
+
+        try:
+            if isinstance(self.address, str):
+                if not self.remove_stale_socket():
+                    self.set_chef(None)
+                    self.handle_error(error_code=4)
+                    return
+                self.server = ThreadingUnixServer(self.address, ChefRequestHandler)
+                self.socket_inode = os.stat(self.address).st_ino
+            else:
+                self.server = self.new_tcp_server()
+        except OSError as err:
+            # The book is not kept if the server cannot listen
+            self.set_chef(None)
+            self.handle_error(error_code=2, error_details=err)
+            return
+
+        self.server.chef_server = self
+        print("{class_name}: listening on {a}".format(class_name=self.__class__, a=self.address))
+        self.is_server_configured = True
+
+
+    # Serve requests until "cleanup" is called (from other thread)
+    def run(self):
+        if not self.is_server_configured:
+            self.config()
+            if not self.is_server_configured:
+                return
+        self.is_serving = True
+        try:
+            self.server.serve_forever()
+        finally:
+            self.is_serving = False
+
+
+    # Read again the recipes files. The current Chef keeps serving
+    # requests until the new one is ready. Returns True on success.
+    def reload(self):
+        with self.reload_lock:
+            chef = self.new_chef()
+            if not chef:
+                self.handle_error(error_code=1, chef_kwargs=self.chef_kwargs)
+                return False
+            self.set_chef(chef)
+        return True
+
+
+    # Execute a request (a dictionary with "action" and "args") and
+    # return its result, ready to be sent as JSON to the client.
+    # Raises ValueError (or KeyError, TypeError) if the request is bad.
+    def execute(self, request):
+        action = request.get("action")
+        args = request.get("args") or {}
+
+        # The same Chef object is used for the whole request,
+        # even if a reload happens meanwhile
+        chef, unique_ids = self.chef_and_ids
+
+        if action == "do_menu":
+            return random.sample(unique_ids, int(args.get("number_of_recipes", 14)))
+
+        if action == "show_menu":
+            return [chef.print_key_value(str(k)) for k in args["recipes_list"]]
+
+        if action == "do_shopping_list":
+            return list(chef.iter_shopping_list(str(k) for k in args["recipes_list"]))
+
+        if action == "tell_me_about":
+            if args.get("recipe_id") is not None:
+                return chef.recipe_book[str(args["recipe_id"])]
+
+            kwargs = {k: v for k, v in args.items() if k in self.tell_me_about_args}
+            offset = kwargs.pop("offset", 0) or 0
+            limit = kwargs.pop("limit", None)
+            count_only = kwargs.pop("count_only", False)
+
+            unique_ids = chef.iter_matching(**kwargs)
+            stop = offset + limit if limit is not None else None
+            page = itertools.islice(unique_ids, offset, stop)
+            if count_only:
+                return sum(1 for _ in page)
+            return [chef.print_key_value(k) for k in page]
+
+        if action == "reload":
+            return self.reload()
+
+        raise ValueError("Unknown action {a}".format(a=action))
+
+
+class ChefRequestHandler(socketserver.StreamRequestHandler):
+
+    # Each connection may send any number of requests, one per line
+    def handle(self):
+        chef_server = self.server.chef_server
+        for line in self.rfile:
+            try:
+                result = chef_server.execute(json.loads(line.decode('utf-8')))
+                response = {"status": "ok", "result": result}
+            except (ValueError, KeyError, TypeError, AttributeError) as err:
+                chef_server.handle_error(error_code=3, request=line, error_details=err)
+                response = {"status": "error", "message": repr(err)}
+
+            self.wfile.write(json.dumps(response).encode('utf-8') + b"\n")
+            self.wfile.flush()
+
+
+# One thread per connection. Threads are "daemon", so they do not block
+# the program exit if a client keeps its connection open.
+class ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ThreadingTCP6Server(ThreadingTCPServer):
+    address_family = socket.AF_INET6
+
+
+class ChefClient():
+
+    ############################################################################
+    # METHODS
+    ############################################################################
+
+    # "address" is the same one given to the ChefServer
+    def __init__(self, address):
+        self.address = address
+
+        # Same meaning as in Chef: the last generated menu. It is kept
+        # here (and not in the server) so each client has its own.
+        self.menu = []
+
+        self.connection = None
+        self.reader = None
+
+
+    def cleanup(self):
+        self.close_connection()
+        self.menu = []
+
+
+    def close_connection(self):
+        if self.reader:
+            self.reader.close()
+        if self.connection:
+            self.connection.close()
+        self.connection = None
+        self.reader = None
+
+
+    # Send a request and wait for its result. The connection is opened
+    # on the first request, and kept open for the next ones.
+    # Raises RuntimeError if the server reports an error, or
+    # ConnectionError if the server is gone (the next request will
+    # try to connect again).
+    def request(self, action, **args):
+        if not self.connection:
+            # The socket is kept only if it gets connected, so a failed
+            # attempt does not break the next requests
+            if isinstance(self.address, str):
+                connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    connection.connect(self.address)
+                except OSError:
+                    connection.close()
+                    raise
+            else:
+                # It tries every address the host resolves to (IPv4 or IPv6)
+                connection = socket.create_connection(self.address)
+            self.connection = connection
+            self.reader = self.connection.makefile('rb')
+
+        message = json.dumps({"action": action, "args": args})
+        try:
+            self.connection.sendall(message.encode('utf-8') + b"\n")
+            line = self.reader.readline()
+        except OSError:
+            self.close_connection()
+            raise
+
+        if not line:
+            self.close_connection()
+            raise ConnectionError("Connection closed by the server at {a}".format(a=self.address))
+
+        response = json.loads(line.decode('utf-8'))
+
+        if response["status"] != "ok":
+            raise RuntimeError(response["message"])
+        return response["result"]
+
+
+    # Returns the lines of the menu ("<unique id>: <title>")
+    def do_menu(self, number_of_recipes=14):
+        self.menu = self.request("do_menu", number_of_recipes=number_of_recipes)
+        return self.request("show_menu", recipes_list=self.menu)
+
+
+    # Returns the lines of the shopping list of the given recipes, or
+    # of the last generated menu if no recipes are given
+    def do_shopping_list(self, recipes_list=None):
+        if recipes_list:
+            self.menu = [str(x) for x in recipes_list]
+        return self.request("do_shopping_list", recipes_list=self.menu)
+
+
+    # Same arguments as Chef.tell_me_about (except "stream").
+    # Returns the lines of the matching recipes, the number of them
+    # if "count_only" is True, or the recipe fields if "recipe_id" is given.
+    def tell_me_about(self, **kwargs):
+        result = self.request("tell_me_about", **kwargs)
+        if isinstance(result, list) and not kwargs.get("recipe_id"):
+            self.menu = [line.split(": ", 1)[0] for line in result]
+        return result
+
+
+    def reload(self):
+        return self.request("reload")
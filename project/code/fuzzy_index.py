@@ -0,0 +1,255 @@
+################################################################################
+#   Project: Cocynero
+#
+#   File: fuzzy_index.py
+#
+#   Description:
+#       Implements the FuzzyIndex class.
+#
+#       FuzzyIndex is a typo-tolerant index over a vocabulary of words
+#       (i.e: the words found in the recipe titles, or in the ingredients).
+#       Each word points to the set of recipe unique ids where it appears,
+#       so a search like "tomatoe" or "parsely" is able to find the recipes
+#       with "tomato" or "parsley" without checking every recipe in the book.
+#
+#       The words are stored in a BK-tree (Burkhard-Keller tree), using
+#       the Damerau-Levenshtein (edit) distance between words, so swapping
+#       two adjacent letters ("fride", "parsely") is a single typo. Thanks
+#       to the triangle inequality, a search only visits the branches of the tree
+#       that can hold words close enough to the searched one, instead of
+#       computing the distance against the whole vocabulary.
+#
+#       All words are "folded" before being indexed or searched: lowercase
+#       and without accents, so "Pimentón", "pimenton" and "PIMENTON"
+#       are the same word.
+#
+#   Notes: N/A
+#
+#   Contact: Alberto Martin Cajal, amartin.glimpse23<AT>gmail.com
+#
+#   URL: https://github.com/amcajal/cocynero
+#
+#   License: GNU GPL v3.0
+#
+#   Copyright (C) 2020 Alberto Martin Cajal
+#
+#   This file is part of Cocynero.
+#
+#   Cocynero is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Cocynero is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+import re
+import unicodedata
+
+class FuzzyIndex():
+
+    ############################################################################
+    # ATTRIBUTES
+    ############################################################################
+
+    # Words are sequences of letters and digits. Everything else
+    # (spaces, commas, parens...) is a word separator.
+    word_pattern = re.compile(r"\w+")
+
+    # Words shorter than this are too small to allow typos on them
+    # (with 1 typo, "de" would match "da", "do", "le", ...). The allowed
+    # edit distance of a word grows with its length: 1 typo every
+    # "chars_per_typo" characters, and never more than the value
+    # requested by the user (i.e: with the default value, "egs" allows
+    # 1 typo, and only words of 6 or more characters allow 2).
+    # Searches may use a different value (see "search").
+    chars_per_typo = 3
+
+
+    ############################################################################
+    # METHODS
+    ############################################################################
+
+    def __init__(self):
+        # The tree is stored "flat": node N is made of terms[N],
+        # children[N] and postings[N]. Node 0 is the root of the tree.
+        # - terms: the (folded) word of each node
+        # - children: dictionary {edit distance: child node number}
+        # - postings: set of recipe unique ids where the word appears
+        self.terms = []
+        self.children = []
+        self.postings = []
+
+        # Direct access from a word to its node, so adding a word
+        # that is already indexed does not need to walk the tree
+        self.term_to_node = {}
+
+
+    def cleanup(self):
+        self.terms = []
+        self.children = []
+        self.postings = []
+        self.term_to_node = {}
+
+
+    # Lowercase the text and remove the accents (and any other
+    # diacritical mark), so "Pimentón" becomes "pimenton"
+    @staticmethod
+    def fold(text):
+        decomposed = unicodedata.normalize("NFKD", text.lower())
+        return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+    # Split a text in its folded words. Numbers alone (i.e: "2" in "2 eggs")
+    # are not useful when searching, so they are ignored.
+    @classmethod
+    def tokenize(cls, text):
+        return [w for w in cls.word_pattern.findall(cls.fold(text)) if not w.isdigit()]
+
+
+    # Damerau-Levenshtein distance: insertions, deletions, substitutions
+    # and transpositions of two adjacent characters cost 1 typo each.
+    # This is the "unrestricted" version (Lowrance-Wagner), which is a
+    # metric, unlike the simpler "optimal string alignment" one: the
+    # BK-tree relies on the triangle inequality. The exact value is
+    # always computed (no early exit), because the BK-tree search needs
+    # it to decide which branches to visit.
+    @staticmethod
+    def edit_distance(word_a, word_b):
+        if word_a == word_b:
+            return 0
+        if not word_a or not word_b:
+            return len(word_a) + len(word_b)
+
+        # Row i + 1 and column j + 1 of "table" hold the distance between
+        # the first i characters of word_a and the first j of word_b.
+        # Row 0 and column 0 are a border bigger than any distance.
+        infinite = len(word_a) + len(word_b)
+        table = [[infinite] * (len(word_b) + 2)]
+        table.append([infinite] + list(range(len(word_b) + 1)))
+        for i in range(1, len(word_a) + 1):
+            table.append([infinite, i] + [0] * len(word_b))
+
+        # Last row where each character of word_a was seen
+        last_row = {}
+        for i, char_a in enumerate(word_a, start=1):
+            # Last column of this row where word_b matched char_a
+            last_match_column = 0
+            for j, char_b in enumerate(word_b, start=1):
+                k = last_row.get(char_b, 0)
+                l = last_match_column
+                if char_a == char_b:
+                    cost = 0
+                    last_match_column = j
+                else:
+                    cost = 1
+                table[i + 1][j + 1] = min(
+                    table[i][j] + cost,
+                    table[i + 1][j] + 1,
+                    table[i][j + 1] + 1,
+                    # Transposition of word_a[k-1] and word_a[i-1], with
+                    # the characters between them deleted or inserted
+                    table[k][l] + (i - k - 1) + 1 + (j - l - 1))
+            last_row[char_a] = i
+
+        return table[-1][-1]
+
+
+    # Number of typos allowed for a word, given the maximum
+    # requested by the user
+    def allowed_distance(self, word, max_distance, chars_per_typo=None):
+        chars_per_typo = chars_per_typo or self.chars_per_typo
+        return min(max_distance, len(word) // chars_per_typo)
+
+
+    # Index all the words of "text" as belonging to recipe "unique_id"
+    def add(self, text, unique_id):
+        for word in self.tokenize(text):
+            self.add_word(word, unique_id)
+
+
+    def add_word(self, word, unique_id):
+        node = self.term_to_node.get(word)
+        if node is not None:
+            self.postings[node].add(unique_id)
+            return
+
+        new_node = len(self.terms)
+        self.terms.append(word)
+        self.children.append({})
+        self.postings.append({unique_id})
+        self.term_to_node[word] = new_node
+
+        if new_node == 0:
+            return
+
+        # Walk down the tree until finding a free slot at the
+        # distance between the new word and the current node word
+        node = 0
+        while True:
+            distance = self.edit_distance(word, self.terms[node])
+            child = self.children[node].get(distance)
+            if child is None:
+                self.children[node][distance] = new_node
+                return
+            node = child
+
+
+    # Return a list of (node, distance) pairs, with the nodes of all the
+    # indexed words at "max_distance" or less from "word" (which shall be
+    # already folded). Only terms, children and postings are used here and
+    # in "search", so they can be replaced by any other "list-like" objects
+    # (see SharedFuzzyIndex in shared_book.py)
+    def search_word(self, word, max_distance):
+        found = []
+        if not self.terms:
+            return found
+
+        pending_nodes = [0]
+        while pending_nodes:
+            node = pending_nodes.pop()
+            distance = self.edit_distance(word, self.terms[node])
+            if distance <= max_distance:
+                found.append((node, distance))
+
+            # Triangle inequality: only children whose distance to the
+            # current node word is in [distance - max, distance + max]
+            # may contain words close enough to the searched one
+            for child_distance, child in self.children[node].items():
+                if abs(child_distance - distance) <= max_distance:
+                    pending_nodes.append(child)
+
+        return found
+
+
+    # Return a dictionary {unique_id: distance} with the recipes containing
+    # ALL the words of "text" (with typos allowed), where "distance" is
+    # the sum of the typos needed to match each word.
+    # Each word allows up to "max_distance" typos, but never more than
+    # 1 every "chars_per_typo" characters (class attribute by default).
+    # An empty dictionary means no recipe contains all the words.
+    def search(self, text, max_distance, chars_per_typo=None):
+        matches = None
+        for word in self.tokenize(text):
+            word_matches = {}
+            allowed = self.allowed_distance(word, max_distance, chars_per_typo)
+            for node, distance in self.search_word(word, allowed):
+                for unique_id in self.postings[node]:
+                    if distance < word_matches.get(unique_id, distance + 1):
+                        word_matches[unique_id] = distance
+
+            if matches is None:
+                matches = word_matches
+            else:
+                matches = {k: v + word_matches[k] for k, v in matches.items() if k in word_matches}
+
+            if not matches:
+                return {}
+
+        return matches or {}
@@ -0,0 +1,216 @@
+################################################################################
+#   Project: Cocynero
+#
+#   File: recipe_deduplicator.py
+#
+#   Description:
+#       Implements the RecipeDeduplicator class.
+#
+#       RecipeDeduplicator is a "transform" object for the RecipeProcessor
+#       (it implements config, run and cleanup). It discards the recipes
+#       that are near-duplicates of a recipe already processed (i.e: the
+#       same dish scraped from two web pages, with a slightly different
+#       title or a couple of different ingredients), so "recipes.csv"
+#       contains each dish only once.
+#
+#       Two recipes are near-duplicates when the Jaccard similarity of
+#       their sets of words (title words and ingredient words, lowercase
+#       and without accents) is equal or bigger than "threshold".
+#       Comparing each recipe against all the previous ones would be far
+#       too slow, so:
+#       - Each recipe is summarized in a MinHash signature (a short list
+#         of numbers that estimates the Jaccard similarity)
+#       - Signatures are split in "bands", and recipes with an identical
+#         band fall in the same "bucket" (Locality Sensitive Hashing).
+#         Only the recipes sharing a bucket are compared.
+#
+#       The recipes are processed one by one, as the RecipeProcessor
+#       feeds them, so there is no need to have all of them in memory.
+#
+#       Input records are recipe lines ("<id>;<title>;<url>;<ingredients>")
+#       or the list of its fields. If another transform object is provided,
+#       it is run first, and the deduplication is done over its output.
+#
+#       A common usage of this class will be the following:
+#       '''
+#       transform = RecipeDeduplicator(transform_obj=(...), threshold=0.8)
+#       recipp = RecipeProcessor(feeder, extract, transform, load)
+#       recipp.config()
+#       recipp.run()
+#       '''
+#
+#   Notes: N/A
+#
+#   Contact: Alberto Martin Cajal, amartin.glimpse23<AT>gmail.com
+#
+#   URL: https://github.com/amcajal/cocynero
+#
+#   License: GNU GPL v3.0
+#
+#   Copyright (C) 2020 Alberto Martin Cajal
+#
+#   This file is part of Cocynero.
+#
+#   Cocynero is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Cocynero is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+import random
+import zlib
+
+from fuzzy_index import FuzzyIndex
+from recipe_processor import RecipeProcessor
+
+class RecipeDeduplicator():
+
+    ############################################################################
+    # ATTRIBUTES
+    ############################################################################
+
+    # Position of the fields in the input records (recipe lines, with
+    # the unique id as first field)
+    field_separator = ";"
+    title_field_index = 1
+    ingr_field_index = 3
+
+    # The hash functions of the signature are h(x) = (a*x + b) mod prime,
+    # with a different (a, b) pair for each position of the signature
+    prime = (1 << 61) - 1
+
+
+    ############################################################################
+    # METHODS
+    ############################################################################
+
+    # - threshold: minimum (estimated) Jaccard similarity to consider
+    #   two recipes near-duplicates
+    # - signature_size: number of hash functions of the MinHash signature.
+    #   Bigger is more accurate, but slower.
+    # - bands: number of bands the signature is split in. More bands
+    #   (of less rows) find more candidates, so less duplicates are
+    #   missed, but more pairs are compared. signature_size must be
+    #   a multiple of bands.
+    # - seed: seed of the hash functions, so results are repeatable
+    def __init__(self,
+                 transform_obj=None,
+                 threshold=0.8,
+                 signature_size=64,
+                 bands=16,
+                 seed=1):
+        self.transform_obj = transform_obj
+        self.threshold = threshold
+        self.signature_size = signature_size
+        self.bands = bands
+        self.seed = seed
+
+        self.rows_per_band = 0
+        self.hash_params = []
+
+        # One dictionary per band: {band content: [recipe numbers]}
+        self.buckets = []
+
+        # Signatures of the recipes kept so far (recipe number = position)
+        self.signatures = []
+
+        self.number_of_duplicates = 0
+
+
+    def cleanup(self):
+        print("{class_name}: {n} near-duplicate recipes discarded".format(
+            class_name=self.__class__,
+            n=self.number_of_duplicates))
+        if self.transform_obj:
+            self.transform_obj.cleanup()
+        self.buckets = []
+        self.signatures = []
+        self.number_of_duplicates = 0
+
+
+    def config(self):
+        if self.bands <= 0 or self.signature_size % self.bands != 0:
+            print("{class_name}: signature_size ({s}) must be a multiple of bands ({b})".format(
+                class_name=self.__class__,
+                s=self.signature_size,
+                b=self.bands))
+            return False
+
+        self.rows_per_band = self.signature_size // self.bands
+        generator = random.Random(self.seed)
+        self.hash_params = [(generator.randrange(1, self.prime), generator.randrange(0, self.prime))
+                            for _ in range(self.signature_size)]
+        self.buckets = [{} for _ in range(self.bands)]
+        self.signatures = []
+        self.number_of_duplicates = 0
+
+        if self.transform_obj:
+            return self.transform_obj.config()
+        return True
+
+
+    # Set of normalized words of the recipe. Title words and ingredient
+    # words are kept apart ("eggs" in the title is not "eggs" as ingredient)
+    def recipe_features(self, fields):
+        features = set()
+        if len(fields) > self.title_field_index:
+            features.update("t:" + w for w in FuzzyIndex.tokenize(fields[self.title_field_index]))
+        for ingredient in fields[self.ingr_field_index:]:
+            features.update("i:" + w for w in FuzzyIndex.tokenize(ingredient))
+        return features
+
+
+    def minhash(self, features):
+        hashes = [zlib.crc32(x.encode('utf-8')) for x in features]
+        if not hashes:
+            return None
+        return tuple(min((a * h + b) % self.prime for h in hashes) for a, b in self.hash_params)
+
+
+    # Fraction of equal positions of both signatures (it estimates
+    # the Jaccard similarity of the recipes)
+    def similarity(self, signature_a, signature_b):
+        return sum(x == y for x, y in zip(signature_a, signature_b)) / self.signature_size
+
+
+    # Returns the input record if it is not a near-duplicate of a previous
+    # one, or RecipeProcessor.discard_tag if it is.
+    def run(self, data):
+        if self.transform_obj:
+            data = self.transform_obj.run(data)
+            if data is None or data == RecipeProcessor.discard_tag:
+                return data
+
+        fields = data.split(self.field_separator) if isinstance(data, str) else data
+        signature = self.minhash(self.recipe_features(fields))
+
+        # Nothing to compare (no title nor ingredients)
+        if signature is None:
+            return data
+
+        bands = [signature[i * self.rows_per_band:(i + 1) * self.rows_per_band]
+                 for i in range(self.bands)]
+
+        candidates = set()
+        for band, bucket in zip(bands, self.buckets):
+            candidates.update(bucket.get(band, ()))
+
+        for candidate in candidates:
+            if self.similarity(signature, self.signatures[candidate]) >= self.threshold:
+                self.number_of_duplicates += 1
+                return RecipeProcessor.discard_tag
+
+        recipe_number = len(self.signatures)
+        self.signatures.append(signature)
+        for band, bucket in zip(bands, self.buckets):
+            bucket.setdefault(band, []).append(recipe_number)
+
+        return data
@@ -59,6 +59,10 @@ class RecipeProcessor():
     # This string is to be able to differentiate the error code lines from any other text line
     unique_error_tag = "COCYNERO_ERRCODE_"
 
+    # Transform objects return this string when the data shall be
+    # silently skipped (i.e: a duplicated recipe), which is not an error
+    discard_tag = "COCYNERO_DISCARD"
+
     ############################################################################
     # METHODS
     ############################################################################
@@ -306,6 +310,9 @@ class RecipeProcessor():
                     self.handle_error(error_code = 7, data="transform_data", method="transform_obj.run()")
                     continue
 
+                if (transform_data == self.discard_tag):
+                    continue
+
                 load_data = self.load_obj.run(transform_data)
                 if (load_data == None):
                     self.handle_error(error_code = 7, data="load_data", method="load_obj.run()")
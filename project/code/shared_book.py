@@ -0,0 +1,446 @@
+################################################################################
+#   Project: Cocynero
+#
+#   File: shared_book.py
+#
+#   Description:
+#       Implements the SharedBook class (and the read-only views it uses).
+#
+#       SharedBook writes the recipe book of a configured Chef, and its
+#       search indexes, in a flat binary layout inside a block of shared
+#       memory (multiprocessing.shared_memory) or a file. Other processes
+#       attach to such block and give their Chef objects read-only views
+#       of it, instead of reading the recipes files and building the
+#       indexes again. This way, a host running many worker processes
+#       keeps ONE copy of the book in memory, no matter the number of
+#       workers.
+#
+#       A common usage of this class will be the following:
+#       '''
+#       (loader process)
+#       chef = Chef(recipes_file=...)
+#       chef.config()
+#       book = SharedBook.create(chef, name="cocynero_book")
+#
+#       (worker processes)
+#       book = SharedBook.attach(name="cocynero_book")
+#       worker_chef = Chef()
+#       book.attach_chef(worker_chef)
+#       worker_chef.do_menu()
+#       (...)
+#       book.cleanup()
+#
+#       (loader process, once all workers are done)
+#       book.cleanup()
+#       '''
+#
+#       "cleanup" also cleans up the Chef objects still attached to the
+#       book (their views would point to released memory), so they must
+#       be attached again (or configured) before being used.
+#
+#       Layout of the block (all numbers are unsigned 32 bits integers,
+#       in the byte order of the host):
+#       - Header: magic number, version, number of sections and then,
+#         for each section, its (offset, length) pair in bytes.
+#       - Sections, in this order: recipe unique ids (sorted), recipe
+#         fields, title index (terms, children, postings), ingredients
+#         index (terms, children, postings) and synonyms (JSON text).
+#       - "String" sections: N, N+1 offsets, and the UTF-8 text of the
+#         N strings, one after the other.
+#       - "Integer lists" sections: N, N+1 offsets, and the integers of
+#         the N lists, one after the other.
+#
+#   Notes: N/A
+#
+#   Contact: Alberto Martin Cajal, amartin.glimpse23<AT>gmail.com
+#
+#   URL: https://github.com/amcajal/cocynero
+#
+#   License: GNU GPL v3.0
+#
+#   Copyright (C) 2020 Alberto Martin Cajal
+#
+#   This file is part of Cocynero.
+#
+#   Cocynero is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Cocynero is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+################################################################################
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+import weakref
+from array import array
+from collections.abc import ItemsView, Mapping, Sequence, ValuesView
+from multiprocessing import shared_memory
+
+from fuzzy_index import FuzzyIndex
+
+class SharedBook():
+
+    ############################################################################
+    # ATTRIBUTES
+    ############################################################################
+
+    magic_number = 0x59434f43 # "COCY"
+    layout_version = 2
+    number_of_sections = 9
+
+    # Recipe fields are stored as a single string, joined with this
+    # character (the same one used in the recipes files, so it can
+    # never be part of a field)
+    field_separator = ";"
+
+
+    ############################################################################
+    # METHODS
+    ############################################################################
+
+    # Do not use directly: use "create" or "attach"
+    def __init__(self, buffer, shm=None, mapped_file=None, is_owner=False):
+        self.shm = shm
+        self.mapped_file = mapped_file
+        self.is_owner = is_owner
+
+        # Chef objects given access to the book with "attach_chef"
+        # (weak references, so a forgotten Chef can still be freed)
+        self.attached_chefs = weakref.WeakSet()
+
+        # Every memoryview over the block is kept here, because the
+        # block cannot be closed while any of them is still alive
+        self.views = []
+        self.buffer = self.new_view(buffer)
+
+        # The header is read with struct (and not with a memoryview), so
+        # nothing keeps the block busy if it has to be closed right away
+        header = struct.unpack_from("=3I", self.buffer) if len(self.buffer) >= 4 * 3 else None
+        if header != (self.magic_number, self.layout_version, self.number_of_sections):
+            self.cleanup()
+            raise ValueError("Not a Cocynero shared book (or a different version)")
+
+        pairs = self.new_view(self.buffer[4 * 3:4 * (3 + 2 * self.number_of_sections)]).cast('I')
+        sections = [self.new_view(self.buffer[pairs[2 * i]:pairs[2 * i] + pairs[2 * i + 1]])
+                    for i in range(self.number_of_sections)]
+
+        unique_ids = StringTable(sections[0], self)
+        self.recipe_book = SharedRecipeBook(unique_ids, StringTable(sections[1], self))
+        self.title_index = SharedFuzzyIndex(
+            StringTable(sections[2], self),
+            IntListTable(sections[3], self),
+            IntListTable(sections[4], self),
+            unique_ids)
+        self.ingr_index = SharedFuzzyIndex(
+            StringTable(sections[5], self),
+            IntListTable(sections[6], self),
+            IntListTable(sections[7], self),
+            unique_ids)
+        self.synonyms = json.loads(bytes(sections[8]).decode('utf-8'))
+
+
+    def new_view(self, view):
+        self.views.append(view)
+        return view
+
+
+    # Release the block. The owner (the process that created it) also
+    # destroys it, so it shall be the last one to call cleanup.
+    # The Chef objects still attached are cleaned up too (their book
+    # would be unreadable anyway), so they must be configured or
+    # attached again before being used.
+    def cleanup(self):
+        for chef in list(self.attached_chefs):
+            if chef.recipe_book is self.recipe_book:
+                chef.cleanup()
+        self.attached_chefs = weakref.WeakSet()
+
+        self.recipe_book = None
+        self.title_index = None
+        self.ingr_index = None
+        for view in reversed(self.views):
+            view.release()
+        self.views = []
+
+        if self.shm:
+            self.shm.close()
+            if self.is_owner:
+                self.shm.unlink()
+            self.shm = None
+
+        if self.mapped_file:
+            self.mapped_file.close()
+            self.mapped_file = None
+
+
+    # Give "chef" read-only access to the shared book and indexes.
+    # Its own book and indexes (if any) are discarded, and it is ready
+    # to be used (no need to call "config"). Calling "config" later
+    # detaches it: the recipes files are read again into its own book.
+    def attach_chef(self, chef):
+        chef.recipe_book = self.recipe_book
+        chef.title_index = self.title_index
+        chef.ingr_index = self.ingr_index
+        chef.synonyms = self.synonyms
+        chef.are_indexes_built = True
+        chef.is_chef_configured = True
+        self.attached_chefs.add(chef)
+
+
+    # Return the flat binary layout (a bytearray) of the book and
+    # indexes of a configured Chef
+    @classmethod
+    def serialize(cls, chef):
+        if not chef.are_indexes_built:
+            chef.build_indexes()
+
+        unique_ids = sorted(chef.recipe_book)
+        recipe_number = {k: n for n, k in enumerate(unique_ids)}
+
+        sections = [
+            encode_strings(unique_ids),
+            encode_strings(cls.field_separator.join(chef.recipe_book[k]) for k in unique_ids)]
+
+        for index in (chef.title_index, chef.ingr_index):
+            sections.append(encode_strings(index.terms))
+            sections.append(encode_int_lists(
+                [x for pair in sorted(children.items()) for x in pair] for children in index.children))
+            sections.append(encode_int_lists(
+                sorted(recipe_number[k] for k in postings) for postings in index.postings))
+
+        sections.append(json.dumps(chef.synonyms).encode('utf-8'))
+
+        header_size = 4 * (3 + 2 * len(sections))
+        header = array('I', [cls.magic_number, cls.layout_version, len(sections)])
+        block = bytearray()
+        for section in sections:
+            header.extend([header_size + len(block), len(section)])
+            block += section
+            # Sections start at multiples of 4 bytes, so they can be
+            # read as arrays of integers
+            block += bytes(-len(block) % 4)
+
+        return bytearray(header.tobytes()) + block
+
+
+    # Write the book of a configured Chef in a new shared memory block
+    # (if "name" is given, or a random name is chosen if neither "name"
+    # nor "path" are given) or in a file (if "path" is given)
+    @classmethod
+    def create(cls, chef, name=None, path=None):
+        data = cls.serialize(chef)
+
+        if path:
+            with open(path, mode='wb') as writer:
+                writer.write(data)
+            return cls.attach(path=path)
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+        shm.buf[:len(data)] = data
+        return cls(shm.buf, shm=shm, is_owner=True)
+
+
+    # Attach to a book previously created with "create"
+    @classmethod
+    def attach(cls, name=None, path=None):
+        if path:
+            with open(path, mode='rb') as reader:
+                mapped_file = mmap.mmap(reader.fileno(), 0, access=mmap.ACCESS_READ)
+            return cls(memoryview(mapped_file), mapped_file=mapped_file)
+
+        if not name:
+            raise ValueError("The name (shared memory) or the path (file) of the book is required")
+
+        # Only the owner shall destroy the block, so it must not be
+        # registered in the resource tracker of this process (the tracker
+        # would destroy it when this process ends).
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+            return cls(shm.buf, shm=shm)
+
+        # Before Python 3.13, SharedMemory always registers the block in
+        # the tracker (on POSIX systems). So the block is opened and mapped
+        # (read-only) here, with the same private module SharedMemory uses.
+        # @TODO remove this when Python 3.13 is the minimum version.
+        try:
+            import _posixshmem
+        except ImportError:
+            # Windows: there is no resource tracker for shared memory
+            shm = shared_memory.SharedMemory(name=name)
+            return cls(shm.buf, shm=shm)
+
+        fd = _posixshmem.shm_open("/" + name.lstrip("/"), os.O_RDONLY)
+        try:
+            mapped_file = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        return cls(memoryview(mapped_file), mapped_file=mapped_file)
+
+
+# Encode an iterable of strings as a "String" section
+def encode_strings(strings):
+    offsets = array('I', [0])
+    text = bytearray()
+    for string in strings:
+        text += string.encode('utf-8')
+        offsets.append(len(text))
+    return array('I', [len(offsets) - 1]).tobytes() + offsets.tobytes() + bytes(text)
+
+
+# Encode an iterable of lists of integers as an "Integer lists" section
+def encode_int_lists(int_lists):
+    offsets = array('I', [0])
+    numbers = array('I')
+    for int_list in int_lists:
+        numbers.extend(int_list)
+        offsets.append(len(numbers))
+    return array('I', [len(offsets) - 1]).tobytes() + offsets.tobytes() + numbers.tobytes()
+
+
+# Read-only list of strings, over a "String" section
+class StringTable(Sequence):
+
+    def __init__(self, section, shared_book):
+        size = section[:4].cast('I')[0]
+        self.offsets = shared_book.new_view(section[4:4 * (size + 2)].cast('I'))
+        self.text = shared_book.new_view(section[4 * (size + 2):])
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return str(self.text[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+    # Sequential walk, much faster than the default one (__getitem__
+    # for each position, with its bounds check)
+    def __iter__(self):
+        offsets = self.offsets
+        text = self.text
+        start = offsets[0]
+        for n in range(1, len(offsets)):
+            end = offsets[n]
+            yield str(text[start:end], 'utf-8')
+            start = end
+
+
+# Read-only list of lists of integers, over an "Integer lists" section
+class IntListTable(Sequence):
+
+    def __init__(self, section, shared_book):
+        size = section[:4].cast('I')[0]
+        self.offsets = shared_book.new_view(section[4:4 * (size + 2)].cast('I'))
+        self.numbers = shared_book.new_view(section[4 * (size + 2):].cast('I'))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.numbers[self.offsets[i]:self.offsets[i + 1]].tolist()
+
+
+# Read-only recipe book. It behaves like the "recipe_book" dictionary
+# of Chef: keys are the unique ids, values are lists of fields.
+class SharedRecipeBook(Mapping):
+
+    def __init__(self, unique_ids, records):
+        self.unique_ids = unique_ids
+        self.records = records
+
+    def __len__(self):
+        return len(self.unique_ids)
+
+    def __iter__(self):
+        return iter(self.unique_ids)
+
+    # Unique ids are sorted, so a binary search finds the recipe
+    def __getitem__(self, unique_id):
+        n = bisect.bisect_left(self.unique_ids, unique_id)
+        if n == len(self.unique_ids) or self.unique_ids[n] != unique_id:
+            raise KeyError(unique_id)
+        return self.records[n].split(SharedBook.field_separator)
+
+    # Walk ids and records by position, instead of the default
+    # implementation (a binary search for each id)
+    def items(self):
+        return SharedRecipeBookItems(self)
+
+    def values(self):
+        return SharedRecipeBookValues(self)
+
+
+class SharedRecipeBookItems(ItemsView):
+
+    def __iter__(self):
+        separator = SharedBook.field_separator
+        for unique_id, record in zip(self._mapping.unique_ids, self._mapping.records):
+            yield unique_id, record.split(separator)
+
+
+class SharedRecipeBookValues(ValuesView):
+
+    def __iter__(self):
+        separator = SharedBook.field_separator
+        for record in self._mapping.records:
+            yield record.split(separator)
+
+
+# Read-only FuzzyIndex. The search methods of FuzzyIndex are used as they
+# are, over list-like views of the shared block.
+class SharedFuzzyIndex(FuzzyIndex):
+
+    def __init__(self, terms, children, postings, unique_ids):
+        super().__init__()
+        self.terms = terms
+        self.children = ChildrenTable(children)
+        self.postings = PostingsTable(postings, unique_ids)
+
+    def cleanup(self):
+        pass
+
+    def add_word(self, word, unique_id):
+        raise TypeError("A shared index is read-only")
+
+
+# Children of each node, as the {distance: child node} dictionaries
+# FuzzyIndex expects (stored as flat [distance, child, distance, child...])
+class ChildrenTable(Sequence):
+
+    def __init__(self, int_lists):
+        self.int_lists = int_lists
+
+    def __len__(self):
+        return len(self.int_lists)
+
+    def __getitem__(self, node):
+        pairs = self.int_lists[node]
+        return dict(zip(pairs[0::2], pairs[1::2]))
+
+
+# Postings of each node, as the sets of unique ids FuzzyIndex expects
+# (stored as the positions of the unique ids in the sorted list)
+class PostingsTable(Sequence):
+
+    def __init__(self, int_lists, unique_ids):
+        self.int_lists = int_lists
+        self.unique_ids = unique_ids
+
+    def __len__(self):
+        return len(self.int_lists)
+
+    def __getitem__(self, node):
+        return {self.unique_ids[n] for n in self.int_lists[node]}